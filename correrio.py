@@ -1,15 +1,51 @@
-import json
+import atexit
+import hashlib
+import mimetypes
+import mmap
 import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
 import time
-from flask import Flask, request, jsonify, send_from_directory, render_template
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from flask import Flask, Response, abort, request, jsonify, send_from_directory, render_template
+from flask.json.provider import JSONProvider
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
+from flask_compress import Compress
+
+class OrjsonProvider(JSONProvider):
+    """Provider JSON do Flask baseado no orjson (usado pelo jsonify)."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype='application/json',
+        )
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Habilita CORS para todas as rotas (Vital para o Render)
+# Compressão gzip/brotli só nas rotas marcadas com @compress.compressed()
+# (os uploads ficam de fora: com X-Sendfile o proxy enviaria o arquivo cru
+# sob um cabeçalho Content-Encoding: gzip)
+app.config['COMPRESS_REGISTER'] = False
+compress = Compress(app)
 
 # --- CONFIGURAÇÃO DE ARQUIVOS ---
-DB_FILE = 'caderno_ptm_db.json'
+SQLITE_FILE = 'caderno_ptm.db'
+DB_FILE = 'caderno_ptm_db.json'  # Formato antigo dos registros (migrado para o SQLite)
 REFERENCIAS_FILE = 'referencias.json'
 
 # Configuração da pasta de Uploads
@@ -18,43 +54,282 @@ if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-# app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # Opcional: Limite de 50MB
+app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # Limite de 50MB (mesmo do frontend)
+
+# Tamanho do buffer usado ao copiar uploads para o disco
+UPLOAD_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+# Tempo de cache dos uploads no navegador (1 ano)
+UPLOAD_MAX_AGE = 365 * 24 * 60 * 60
+
+# Única parte do nome enviado que vai para o nome salvo em disco
+_EXT_RE = re.compile(r'\.[A-Za-z0-9]{1,8}$')
+
+# Entrega dos uploads pelo proxy reverso (o Python não copia os bytes):
+# - Apache (mod_xsendfile): USE_X_SENDFILE=1
+# - nginx: UPLOADS_ACCEL_PREFIX=/protected_uploads/ com
+#     location /protected_uploads/ { internal; alias /app/uploads/; }
+# Sem nenhuma das duas, o Flask envia o arquivo (desenvolvimento local).
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+UPLOADS_ACCEL_PREFIX = os.environ.get('UPLOADS_ACCEL_PREFIX')
 
 # --- FUNÇÕES AUXILIARES (CARREGAR/SALVAR) ---
 
-def load_data():
-    """Carrega registros do arquivo JSON. Cria se não existir."""
-    if not os.path.exists(DB_FILE):
-        return []
-    try:
-        with open(DB_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+def _json_resp(obj, status=200):
+    """Resposta JSON serializada direto pelo orjson (sem passar pelo jsonify)."""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+# Identifica esta execução do servidor nos ETags (as versões recomeçam do zero)
+_BOOT_ID = f'{time.time_ns():x}'
+
+def _conditional_json(nome, versao, build):
+    """Resposta JSON com ETag; devolve 304 se o cliente já tem esta versão.
+
+    `build` só é chamado (e o JSON só é serializado) quando a versão mudou.
+    """
+    etag = f'{nome}-{_BOOT_ID}-{versao}'
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = _json_resp(build())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Cache em memória dos arquivos JSON, invalidado pelo mtime do arquivo.
+# `versao` muda a cada alteração dos dados e é usada no ETag das respostas.
+_cache = {
+    REFERENCIAS_FILE: {'data': None, 'mtime': -1, 'versao': 0},
+}
+_cache_lock = threading.Lock()
+
+# Arquivos com alterações ainda não gravadas em disco. As gravações são
+# agrupadas: uma rajada de alterações vira uma única escrita do arquivo.
+_dirty = set()
+_flush_event = threading.Event()
+FLUSH_DELAY = 0.5  # segundos
+
+def _load_json(path, empty=list):
+    """Retorna o conteúdo do arquivo JSON, relendo do disco só se ele mudou.
+
+    `empty` cria o valor devolvido quando o arquivo não existe ou é inválido.
+    """
+    entry = _cache[path]
+    with _cache_lock:
+        # Alterações pendentes são mais novas que o arquivo em disco
+        if path in _dirty:
+            return entry['data']
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            if entry['data'] is None or entry['mtime'] != -1:
+                entry['data'], entry['mtime'] = empty(), -1
+                entry['versao'] += 1
+            return entry['data']
+
+        if entry['data'] is not None and entry['mtime'] == mtime:
+            return entry['data']
+
+        try:
+            # Lê via mmap: o orjson lê direto das páginas do arquivo, sem cópia
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    entry['data'] = orjson.loads(view)
+        except (orjson.JSONDecodeError, FileNotFoundError, ValueError):
+            # ValueError: arquivo vazio (mmap não aceita tamanho 0)
+            entry['data'] = empty()
+        entry['mtime'] = mtime
+        entry['versao'] += 1
+        return entry['data']
+
+def _write_json(path, data):
+    """Grava o arquivo JSON em disco e retorna o novo mtime.
+
+    Escreve num arquivo temporário e troca com os.replace, para que uma
+    queda no meio da gravação nunca deixe o arquivo corrompido.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return os.stat(path).st_mtime_ns
+
+def _save_json(path, data):
+    """Atualiza o cache e agenda a gravação do arquivo em segundo plano."""
+    with _cache_lock:
+        _cache[path]['data'] = data
+        _cache[path]['versao'] += 1
+        _dirty.add(path)
+    _flush_event.set()
+
+def flush_json():
+    """Grava em disco todos os arquivos JSON com alterações pendentes."""
+    with _cache_lock:
+        for path in list(_dirty):
+            entry = _cache[path]
+            try:
+                entry['mtime'] = _write_json(path, entry['data'])
+            except Exception as e:
+                # Continua pendente e será gravado de novo no próximo ciclo
+                print(f"Erro ao gravar {path}: {e}")
+                continue
+            _dirty.discard(path)
+
+def _flush_loop():
+    while True:
+        _flush_event.wait()
+        time.sleep(FLUSH_DELAY)  # Espera a rajada de alterações terminar
+        _flush_event.clear()
+        try:
+            flush_json()
+        except Exception as e:
+            print(f"Erro ao gravar arquivos JSON: {e}")
+        if _dirty:
+            _flush_event.set()  # Tenta de novo após FLUSH_DELAY
 
-def save_data(data):
-    """Salva registros no arquivo JSON."""
-    with open(DB_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+threading.Thread(target=_flush_loop, name='json-flush', daemon=True).start()
+atexit.register(flush_json)
 
 def load_referencias():
-    """Carrega referências do arquivo JSON. Cria se não existir."""
-    if not os.path.exists(REFERENCIAS_FILE):
-        return []
-    try:
-        with open(REFERENCIAS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+    """Carrega referências do arquivo JSON como dicionário {nm: referência}."""
+    referencias = _load_json(REFERENCIAS_FILE, dict)
+    if isinstance(referencias, list):
+        # Formato antigo (lista de objetos): converte e regrava indexado pelo NM.
+        # A chave é sempre str (é o que o JSON grava); itens sem NM são ignorados.
+        referencias = {
+            str(ref['nm']): ref
+            for ref in referencias
+            if isinstance(ref, dict) and ref.get('nm') is not None
+        }
+        save_referencias(referencias)
+    return referencias
 
 def save_referencias(data):
     """Salva referências no arquivo JSON."""
-    with open(REFERENCIAS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    _save_json(REFERENCIAS_FILE, data)
+
+# --- BANCO SQLITE (REGISTROS) ---
+
+# Campos informados no cadastro de saída
+CAMPOS_SAIDA = (
+    'nm_saida', 'descricao_saida', 'quantidade_saida', 'destino_saida',
+    'responsavel_entrega', 'data_doc_saida', 'deposito_saida',
+    'num_doc_saida', 'item_saida',
+)
+
+_db = sqlite3.connect(SQLITE_FILE, check_same_thread=False)
+_db.row_factory = sqlite3.Row
+_db_lock = threading.Lock()
+
+# Muda a cada escrita na tabela registros feita por este processo
+_registros_versao = 0
+
+def _registros_alterados():
+    """Marca que a tabela registros mudou. Chamar com _db_lock adquirido."""
+    global _registros_versao
+    _registros_versao += 1
+
+def registros_versao():
+    """Versão dos registros usada no ETag do GET.
+
+    O PRAGMA data_version muda quando outra conexão (ex.: outro worker do
+    gunicorn) grava no banco; o contador local cobre as gravações desta.
+    """
+    with _db_lock:
+        data_version = _db.execute('PRAGMA data_version').fetchone()[0]
+        return f'{data_version}.{_registros_versao}'
+
+def init_db():
+    """Cria a tabela de registros e migra os dados do JSON antigo, se houver."""
+    with _db_lock, _db:
+        _db.execute('PRAGMA journal_mode=WAL')
+        _db.execute('PRAGMA synchronous=NORMAL')
+        _db.execute('PRAGMA mmap_size=268435456')
+        _db.execute("""
+            CREATE TABLE IF NOT EXISTS registros (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nm_saida TEXT NOT NULL,
+                descricao_saida TEXT NOT NULL,
+                quantidade_saida INTEGER NOT NULL,
+                destino_saida TEXT NOT NULL,
+                responsavel_entrega TEXT NOT NULL,
+                data_doc_saida TEXT NOT NULL,
+                deposito_saida TEXT NOT NULL,
+                num_doc_saida TEXT NOT NULL,
+                item_saida TEXT NOT NULL,
+
+                -- Campos de Confirmação/Coleta
+                data_coleta TEXT DEFAULT 'Pendente',
+                nome_motorista TEXT,
+                nota_fiscal TEXT,
+                anexos TEXT,
+
+                -- Chave de unicidade
+                UNIQUE(num_doc_saida, item_saida)
+            )
+        """)
+
+        # Migração única do caderno_ptm_db.json, registrada no user_version do
+        # banco para não reimportar registros apagados depois (ex.: reset)
+        migrado = _db.execute('PRAGMA user_version').fetchone()[0] >= 1
+        vazio = _db.execute('SELECT 1 FROM registros LIMIT 1').fetchone() is None
+        if not migrado and vazio and os.path.exists(DB_FILE):
+            try:
+                with open(DB_FILE, 'rb') as f:
+                    antigos = orjson.loads(f.read())
+            except orjson.JSONDecodeError:
+                antigos = []
+            # Linhas sem algum campo obrigatório caem no NOT NULL e são ignoradas
+            _db.executemany(
+                'INSERT OR IGNORE INTO registros (id, ' + ', '.join(CAMPOS_SAIDA) +
+                ', data_coleta, nome_motorista, nota_fiscal, anexos) VALUES (' +
+                ', '.join('?' * (len(CAMPOS_SAIDA) + 5)) + ')',
+                [
+                    (r.get('id'), *(r.get(c) for c in CAMPOS_SAIDA),
+                     r.get('data_coleta', 'Pendente'), r.get('nome_motorista', ''),
+                     r.get('nota_fiscal', ''), orjson.dumps(r.get('anexos', [])).decode('utf-8'))
+                    for r in antigos if isinstance(r, dict)
+                ],
+            )
+        _db.execute('PRAGMA user_version = 1')
+
+def row_to_registro(row):
+    """Converte uma linha do SQLite no dicionário usado pela API."""
+    registro = dict(row)
+    registro['anexos'] = orjson.loads(registro['anexos']) if registro['anexos'] else []
+    return registro
+
+def create_registro(data):
+    """Insere um novo registro de saída e retorna o ID (int) gerado.
+
+    Lança sqlite3.IntegrityError se já existir o mesmo Doc + Item ou se
+    faltar algum campo obrigatório (NOT NULL).
+    """
+    with _db_lock, _db:
+        cursor = _db.execute(
+            'INSERT INTO registros (' + ', '.join(CAMPOS_SAIDA) +
+            ", data_coleta, nome_motorista, nota_fiscal, anexos) VALUES (" +
+            ', '.join('?' * len(CAMPOS_SAIDA)) + ", 'Pendente', '', '', '[]')",
+            tuple(data.get(c) for c in CAMPOS_SAIDA),
+        )
+        _registros_alterados()
+    return cursor.lastrowid
+
+def load_data():
+    """Carrega todos os registros do banco."""
+    with _db_lock:
+        rows = _db.execute('SELECT * FROM registros ORDER BY id').fetchall()
+    return [row_to_registro(row) for row in rows]
+
+init_db()
 
 # --- ROTAS ---
 
 @app.route('/')
+@compress.compressed()
 def index():
     """Serve o arquivo HTML principal."""
     return render_template('index.html')
@@ -71,13 +346,37 @@ def upload_file():
 
     if file:
         try:
+            # Nome original só para exibição no frontend
             filename = secure_filename(file.filename)
-            # Adiciona timestamp para garantir unicidade
-            unique_filename = f"{int(time.time())}_{filename}"
+            ext_match = _EXT_RE.search(file.filename)
+            ext = ext_match.group(0).lower() if ext_match else ''
+
+            # O nome salvo é o hash do conteúdo: o mesmo arquivo enviado de
+            # novo reaproveita o que já está em disco
+            digest = hashlib.blake2b(digest_size=16)
+            while chunk := file.stream.read(UPLOAD_BUFFER_SIZE):
+                digest.update(chunk)
+            unique_filename = digest.hexdigest() + ext
             file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            file.save(file_path)
-            
+
+            if not os.path.exists(file_path):
+                # Grava num temporário e só então troca para o nome final, para
+                # que o nome do hash nunca aponte para um arquivo incompleto
+                fd, tmp_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], suffix='.part')
+                try:
+                    # Copia em blocos de 1MB (file.save usa blocos de 16KB)
+                    file.stream.seek(0)
+                    with os.fdopen(fd, 'wb', buffering=UPLOAD_BUFFER_SIZE) as out:
+                        shutil.copyfileobj(file.stream, out, length=UPLOAD_BUFFER_SIZE)
+                        out.flush()
+                        os.fsync(out.fileno())
+                    # mkstemp cria com 0600; o proxy (X-Accel/X-Sendfile) precisa ler
+                    os.chmod(tmp_path, 0o644)
+                    os.replace(tmp_path, file_path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+
             # Retorna o nome salvo e o nome original
             return jsonify({'filename': unique_filename, 'original_name': filename}), 200
         except Exception as e:
@@ -85,18 +384,38 @@ def upload_file():
 
     return jsonify({'error': 'Erro desconhecido.'}), 500
 
+@app.errorhandler(413)
+def arquivo_muito_grande(e):
+    """Responde em JSON quando o upload passa de MAX_CONTENT_LENGTH."""
+    return jsonify({'error': 'Arquivo excede o limite de 50MB.'}), 413
+
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
     """Rota para visualizar a imagem/pdf clicando no link."""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    if UPLOADS_ACCEL_PREFIX:
+        file_path = safe_join(app.config['UPLOAD_FOLDER'], filename)
+        if file_path is None or not os.path.isfile(file_path):
+            abort(404)
+        # O nginx intercepta o cabeçalho e envia o arquivo direto do disco
+        response = Response(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            headers={'X-Accel-Redirect': UPLOADS_ACCEL_PREFIX.rstrip('/') + '/' + filename},
+        )
+    else:
+        response = send_from_directory(
+            app.config['UPLOAD_FOLDER'], filename, conditional=True, max_age=UPLOAD_MAX_AGE
+        )
+
+    # Nomes salvos nunca mudam de conteúdo: o navegador pode guardar para sempre
+    response.headers['Cache-Control'] = f'public, max-age={UPLOAD_MAX_AGE}, immutable'
+    return response
 
 # --- CRUD DE REGISTROS ---
 @app.route('/api/registros', methods=['GET', 'POST', 'DELETE'])
+@compress.compressed()
 def handle_registros():
-    registros = load_data()
-
     if request.method == 'GET':
-        return jsonify(registros)
+        return _conditional_json('registros', registros_versao(), load_data)
 
     if request.method == 'POST':
         data = request.get_json()
@@ -104,126 +423,124 @@ def handle_registros():
         # Cenário 1: ATUALIZAÇÃO (Confirmação de Entrega)
         # Verifica se tem ID e se não é '0' (que seria novo)
         if 'id' in data and str(data['id']) != '0':
-            registro_encontrado = False
-            for i, reg in enumerate(registros):
-                if str(reg['id']) == str(data['id']):
-                    # Atualiza apenas os campos de entrega
-                    registros[i]['data_coleta'] = data.get('data_coleta', 'Pendente')
-                    registros[i]['nome_motorista'] = data.get('nome_motorista', '')
-                    registros[i]['nota_fiscal'] = data.get('nota_fiscal', '')
-                    
-                    # Se houver novos anexos, atualiza a lista
-                    if 'anexos' in data:
-                        registros[i]['anexos'] = data['anexos']
-                    
-                    registro_encontrado = True
-                    break
-            
-            if registro_encontrado:
-                save_data(registros)
+            # Atualiza apenas os campos de entrega
+            campos = {
+                'data_coleta': data.get('data_coleta', 'Pendente'),
+                'nome_motorista': data.get('nome_motorista', ''),
+                'nota_fiscal': data.get('nota_fiscal', ''),
+            }
+
+            # Se houver novos anexos, atualiza a lista
+            if 'anexos' in data:
+                campos['anexos'] = orjson.dumps(data['anexos']).decode('utf-8')
+
+            with _db_lock, _db:
+                cursor = _db.execute(
+                    'UPDATE registros SET ' + ', '.join(f'{c} = ?' for c in campos) + ' WHERE id = ?',
+                    (*campos.values(), str(data['id'])),
+                )
+                if cursor.rowcount:
+                    _registros_alterados()
+
+            if cursor.rowcount:
                 return jsonify({'message': 'Registro atualizado com sucesso.'}), 200
             else:
                 return jsonify({'error': 'Registro não encontrado para atualização.'}), 404
 
         # Cenário 2: NOVO CADASTRO (Saída)
         else:
-            # Validação de Duplicidade (Mesmo Doc + Mesmo Item)
-            for r in registros:
-                if str(r['num_doc_saida']) == str(data['num_doc_saida']) and \
-                   str(r['item_saida']) == str(data['item_saida']):
+            # Duplicidade (Mesmo Doc + Mesmo Item) é barrada pelo índice UNIQUE
+            try:
+                novo_id = create_registro(data)
+            except sqlite3.IntegrityError as e:
+                if e.sqlite_errorname == 'SQLITE_CONSTRAINT_UNIQUE':
                     return jsonify({'error': f"Já existe um registro com Doc {data['num_doc_saida']} e Item {data['item_saida']}."}), 409
+                return jsonify({'error': 'Campos obrigatórios não preenchidos.'}), 400
 
-            # Gera novo ID
-            novo_id = 1
-            if registros:
-                # Pega o maior ID existente e soma 1
-                novo_id = max(int(r['id']) for r in registros) + 1
-
-            novo_registro = {
-                'id': str(novo_id),
-                'nm_saida': data['nm_saida'],
-                'descricao_saida': data['descricao_saida'],
-                'quantidade_saida': data['quantidade_saida'],
-                'destino_saida': data['destino_saida'],
-                'responsavel_entrega': data['responsavel_entrega'],
-                'data_doc_saida': data['data_doc_saida'],
-                'deposito_saida': data['deposito_saida'],
-                'num_doc_saida': data['num_doc_saida'],
-                'item_saida': data['item_saida'],
-                
-                # Campos vazios iniciais
-                'data_coleta': 'Pendente',
-                'nome_motorista': '',
-                'nota_fiscal': '',
-                'anexos': []
-            }
-            registros.append(novo_registro)
-            save_data(registros)
             return jsonify({'message': 'Cadastro realizado com sucesso!', 'id': novo_id}), 201
 
     return jsonify({'error': 'Método não permitido'}), 405
 
 # --- CRUD DE REFERÊNCIAS (NM/DESCRIÇÃO) ---
 @app.route('/api/referencias', methods=['GET', 'POST'])
+@compress.compressed()
 def handle_referencias():
     referencias = load_referencias()
 
     if request.method == 'GET':
-        return jsonify(referencias)
+        # O frontend espera uma lista de referências
+        return _conditional_json(
+            'referencias', _cache[REFERENCIAS_FILE]['versao'], lambda: list(referencias.values())
+        )
 
     if request.method == 'POST':
-        data = request.get_json()
+        data = request.get_json(silent=True)
+
+        novas = data.get('referencias') if isinstance(data, dict) else None
+        if isinstance(novas, list) and all(
+            isinstance(ref, dict) and ref.get('nm') is not None for ref in novas
+        ):
+            # Atualiza existentes ou adiciona novos (NM -> Objeto); a chave é
+            # sempre str, igual à gravada no JSON
+            referencias.update({str(ref['nm']): ref for ref in novas})
 
-        if 'referencias' in data:
-            # Cria um dicionário para facilitar a atualização (NM -> Objeto)
-            nm_map = {ref['nm']: ref for ref in referencias}
-            
-            # Atualiza existentes ou adiciona novos
-            for new_ref in data['referencias']:
-                nm_map[new_ref['nm']] = new_ref
-            
-            # Converte de volta para lista
-            nova_lista_referencias = list(nm_map.values())
-            
-            save_referencias(nova_lista_referencias)
+            save_referencias(referencias)
             return jsonify({'message': 'Referências processadas com sucesso!'}), 200
         
         return jsonify({'error': 'Formato inválido. Esperado { "referencias": [] }'}), 400
 
     return jsonify({'error': 'Método não permitido'}), 405
 
+@app.route('/api/referencias', methods=['DELETE'])
+def bulk_delete_referencias():
+    """Remove várias referências de uma vez. Esperado { "nms": [] }."""
+    data = request.get_json(silent=True)
+    nms = data.get('nms') if isinstance(data, dict) else None
+    if not isinstance(nms, list) or not all(isinstance(nm, str) for nm in nms):
+        return jsonify({'error': 'Formato inválido. Esperado { "nms": [] }'}), 400
+
+    referencias = load_referencias()
+    removidas = [nm for nm in set(nms) if referencias.pop(nm, None) is not None]
+
+    if removidas:
+        save_referencias(referencias)
+    return jsonify({'message': f'{len(removidas)} referência(s) removida(s).', 'removidas': removidas}), 200
+
 @app.route('/api/referencias/<nm>', methods=['DELETE'])
 def delete_referencia(nm):
     referencias = load_referencias()
-    
-    # Filtra removendo o NM especificado
-    nova_lista = [ref for ref in referencias if ref['nm'] != nm]
 
-    if len(nova_lista) < len(referencias):
-        save_referencias(nova_lista)
+    if referencias.pop(nm, None) is not None:
+        save_referencias(referencias)
         return jsonify({'message': f'Referência {nm} removida.'}), 200
     
     return jsonify({'error': 'Referência não encontrada.'}), 404
 
 # --- RESET GERAL ---
+def _delete_file(file_path):
+    try:
+        os.unlink(file_path)
+    except Exception as e:
+        print(f"Erro ao deletar {file_path}: {e}")
+
 @app.route('/api/reset', methods=['DELETE'])
 def reset_data():
     """Apaga tudo: DB, Referências e Arquivos de Upload."""
     try:
-        # Limpa JSONs
-        save_data([])
-        save_referencias([])
+        # Limpa registros e referências
+        with _db_lock, _db:
+            _db.execute('DELETE FROM registros')
+            _db.execute("DELETE FROM sqlite_sequence WHERE name = 'registros'")
+            _registros_alterados()
+        save_referencias({})
         
-        # Limpa pasta de uploads
+        # Limpa pasta de uploads (remoções em paralelo)
         if os.path.exists(UPLOAD_FOLDER):
-            for filename in os.listdir(UPLOAD_FOLDER):
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                try:
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                except Exception as e:
-                    print(f"Erro ao deletar {file_path}: {e}")
-                    
+            with os.scandir(UPLOAD_FOLDER) as entries:
+                file_paths = [entry.path for entry in entries if entry.is_file()]
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                pool.map(_delete_file, file_paths)
+
         return jsonify({'message': 'Sistema resetado com sucesso.'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -231,4 +548,5 @@ def reset_data():
 if __name__ == "__main__":
     # Configuração para rodar tanto local quanto no Render
     port = int(os.environ.get("PORT", 5000))
-    app.run(debug=True, host="0.0.0.0", port=port)
+    # Em produção use: gunicorn correrio:app (ver gunicorn.conf.py)
+    app.run(debug=True, host="0.0.0.0", port=port, threaded=True)
@@ -0,0 +1,17 @@
+import os
+
+# Configuração do Gunicorn (lida automaticamente ao rodar `gunicorn correrio:app`)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# As rotas são quase só I/O (disco e uploads), então usamos threads:
+# enquanto uma requisição espera o disco, outra é atendida no mesmo processo.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Um único processo por padrão, pois o cache dos arquivos JSON e as gravações
+# pendentes ficam em memória (outro processo veria dados atrasados)
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Uploads grandes podem demorar mais que o timeout padrão (30s)
+timeout = 120